@@ -1,26 +1,34 @@
+import asyncio
 import json
-from typing import List, Optional, Dict
-import nltk
+import logging
+import functools
+import itertools
+import os
+from typing import List, Optional, Dict, Tuple
 import re
+from re import _parser as sre_parser  # Разбор паттерна для вычисления первых символов
+import ahocorasick
 import pymorphy3 as pym
 from nltk.corpus import stopwords
-from nltk.tokenize import word_tokenize
-from fuzzywuzzy import fuzz
+from rapidfuzz import fuzz, process
+
+try:
+    import re2  # Опционально: RE2 ищет за линейное время, без бэктрекинга
+except ImportError:
+    re2 = None
+
+# Движок для паттерна ссылок: "re" (по умолчанию) или "re2".
+# В RE2 \s и \d совпадают только с ASCII, поэтому, например, ссылки с
+# неразрывным пробелом ("НК\xa0РФ") под RE2 теряются; включать осознанно
+LEGAL_REGEX_ENGINE = os.environ.get("LEGAL_REGEX_ENGINE", "re")
 
 import uvicorn
 from fastapi import FastAPI, Request, Depends
 from pydantic import BaseModel
 from contextlib import asynccontextmanager
 
-import ssl
+logger = logging.getLogger(__name__)
 
-# Отключаем проверку SSL (небезопасно, использовать только для тестирования)
-try:
-    _create_unverified_https_context = ssl._create_unverified_context
-except AttributeError:
-    pass
-else:
-    ssl._create_default_https_context = _create_unverified_https_context
 
 class LawLink(BaseModel):
     law_id: Optional[int] = None
@@ -41,235 +49,365 @@ class TextRequest(BaseModel):
 morph_analyzer = None
 stopwords_ru = None
 law_aliases_invers = None
+law_keys_lower = None
+law_key_ids = None
+law_automaton = None
 
 
-def normalize_text(text: str) -> str:
+# Общее начало ссылки: подпункт -> пункт | часть -> статья
+_LEGAL_PREFIX = (
+    r'(?:в\s+)?(?:(?P<подпункт_ключ>пп\.|подпункт[а-я]{0,7}|подп\.)\s*(?P<подпункт_номера>(?:\d{1,4}[а-я]?|[а-я])(?:\s*,\s*(?:\d{1,4}[а-я]?|[а-я]))*(?:\s*и\s*(?:\d{1,4}[а-я]?|[а-я]))?)\s+)?'
+    r'(?:в\s+)?(?:(?P<пункт_ключ>п\.|пункт[а-я]{0,5}|пунт[а-я]{0,5})\s*(?P<пункт_номера>(?:\d{1,4}(?:[\.\-]\d{1,3})*[а-я]?|[а-я])(?:\s*,\s*(?:\d{1,4}(?:[\.\-]\d{1,3})*[а-я]?|[а-я]))*(?:\s*и\s*(?:\d{1,4}(?:[\.\-]\d{1,3})*[а-я]?|[а-я]))?)\s+)?'
+    r'(?:в\s+)?(?:(?P<часть_ключ>ч\.|част[ьи])\s*(?P<часть_номера>(?:\d{1,3}(?:\.\d{1,3})?|[а-я])(?:\s*,\s*(?:\d{1,3}(?:\.\d{1,3})?|[а-я]))*(?:\s*и\s*(?:\d{1,3}(?:\.\d{1,3})?|[а-я]))?)(?:\s*,\s*)?\s+)?'
+    r'(?:в\s+)?(?:(?P<статья_ключ>ст\.|стать[ейиюя]|статей?|статья)\s*(?:(?:в|на|по)\s+)?(?P<статья_номера>(?:\d{1,4}(?:[\.\-]\d{1,3})*[а-я]?)(?:\s*,\s*(?:\d{1,4}(?:[\.\-]\d{1,3})*[а-я]?))*(?:\s*и\s*(?:\d{1,4}(?:[\.\-]\d{1,3})*[а-я]?))?)\s+)?'
+)
+
+# Названия законов по семействам
+_PAT_KODEKS = (
+    # Кодексы
+    r'(?:Арбитражн(?:ого|ый)\s+процессуальн(?:ого|ый)|Бюджетн(?:ого|ый)|Водн(?:ого|ый)|Воздушн(?:ого|ый)|Градостроительн(?:ого|ый)|Гражданск(?:ого|ий)|Гражданск(?:ого|ий)\s+процессуальн(?:ого|ый)|Жилищн(?:ого|ый)|Семейн(?:ого|ый)|Таможенн(?:ого|ый)|Трудов(?:ого|ой)|Уголовно-исполнительн(?:ого|ый)|Уголовно-процессуальн(?:ого|ый)|Уголовн(?:ого|ый)|Лесн(?:ого|ой)|Налогов(?:ого|ый)|Земельн(?:ого|ый))\s+кодекс(?:а|)(?:\s+Российской Федерации|\s+России|\s+РФ|)'
+    # Кодексы об административных правонарушениях
+    r'|Кодекс(?:а|)(?:\s+Российской Федерации|\s+России|\s+РФ|)?\s+об\s+административных\s+правонарушениях'
+    # Другие кодексы
+    r'|Кодекс(?:а|)\s+административного\s+судопроизводства(?:\s+Российской Федерации|\s+России|\s+РФ|)?'
+    r'|Кодекс(?:а|)\s+внутреннего\s+водного\s+транспорта(?:\s+Российской Федерации|\s+России|\s+РФ|)?'
+    r'|Кодекс(?:а|)\s+торгового\s+мореплавания(?:\s+Российской Федерации|\s+России|\s+РФ|)?'
+)
+_PAT_ABBR = (
+    # Аббревиатуры
+    r'АПК(?:\s+(?:России|РФ))?|БК(?:\s+(?:России|РФ))?|ГК(?:\s+РФ)?|ГПК(?:\s+(?:России|РФ))?|ЖК(?:\s+(?:России|РФ))?|СК(?:\s+(?:России|РФ))?|ТК(?:\s+РФ)?'
+    r'|УИК(?:\s+(?:России|РФ))?|УПК(?:\s+(?:России|РФ))?|УК(?:\s+(?:России|РФ))?|ЛК(?:\s+(?:России|РФ))?|НК(?:\s+(?:России|РФ))?|ЗК(?:\s+(?:России|РФ))?'
+    r'|КоАП(?:\s+Российской Федерации|\s+России|\s+РФ|)?'
+)
+_PAT_UKAZ = (
+    # Указы Президента
+    r'Указ(?:а|)(?:\s+Президента(?:\s+Российской Федерации|\s+России|\s+РФ|)?)?(?:\s+(?:№?\s*\d+|\s*от\s*\d{2}\.\d{2}\.\d{4}))?(?:\s*«[^»]*»)?'
+    # Распоряжения Президента
+    r'|Распоряжени(?:я|е)(?:\s+Президента(?:\s+Российской Федерации|\s+России|\s+РФ|)?)?(?:\s+(?:№?\s*\d+-\s*рп|от\s*\d{2}\.\d{2}\.\d{4}))?(?:\s*«[^»]*»)?'
+    r'|РП(?:\s+(?:№?\s*\d+-\s*рп|от\s*\d{2}\.\d{2}\.\d{4}))?(?:\s*«[^»]*»)?'
+)
+_PAT_FZ = (
+    # Федеральные законы
+    r'Федеральн(?:ого|ый)\s+закон(?:а|)(?:\s+[^,\.;]*)?'
+    r'|ФЗ(?:\s+[^,\.;]*)?'
+    r'|Закона\s+«[^»]*»'
+    r'|Закона\s+"[^"]*"'
+    # Основы законодательства
+    r'|Основы\s+законодательства(?:\s+(?:Российской\s+Федерации|России|РФ))?(?:\s+№?\s*\d+(?:-I)?)?(?:\s+от\s+\d{2}\.\d{2}\.\d{4})?(?:\s*«[^»]*»)?'
+    # Законы Российской Федерации
+    r'|Закон(?:\s+(?:Российской\s+Федерации|России|РФ))?(?:\s+№?\s*\d+(?:-I)?)?(?:\s+от\s+\d{2}\.\d{2}\.\d{4})?(?:\s*«[^»]*»)?'
+)
+_PAT_KONST = (
+    # Конституция
+    r'Конституци(?:и|я)(?:\s+РФ|\s+России|\s+Российской Федерации)?'
+)
+_PAT_FSBU_PBU = (
+    # Федеральные стандарты бухгалтерского учета
+    r'Федеральный\s+стандарт\s+бухгалтерского\s+учета(?:\s+(?:государственных\s+финансов|для\s+организаций\s+государственного\s+сектора))?(?:\s+ФСБУ\s*\d+(?:\/\d{4})?)?(?:\s*«[^»]*»)?'
+    r'|ФСБУ(?:\s+(?:государственных\s+финансов|для\s+организаций\s+государственного\s+сектора))?(?:\s*\d+(?:\/\d{4})?)?(?:\s*«[^»]*»)?'
+    # Положения по бухгалтерскому учету
+    r'|Положение\s+по\s+бухгалтерскому\s+учету(?:\s+ПБУ\s*\d+(?:\/\d{4})?)?(?:\s*«[^»]*»)?'
+    r'|ПБУ(?:\s*\d+(?:\/\d{4})?)?(?:\s*«[^»]*»)?'
+    # Положение по ведению бухгалтерского учета
+    r'|Положени(?:я|е)\s+по\s+ведению\s+бухгалтерского\s+учета\s+и\s+бухгалтерской\s+отчетности\s+в\s+Российской\s+Федерации'
+)
+
+# Ссылка должна заканчиваться пробелом, знаком препинания или концом текста.
+# RE2 не поддерживает lookahead, поэтому для него граница поглощается
+# (вне группы остальное).
+_LEGAL_END = r'(?=\s|,|\.|;|$)'
+_LEGAL_END_RE2 = r'(?:\s|,|\.|;|$)'
+
+def _first_chars(items):
+    """Возможные первые символы разобранного паттерна и признак того, что он может совпасть с пустой строкой"""
+    chars = set()
+    for op, av in items:
+        if op == sre_parser.LITERAL:
+            chars.add(chr(av).lower())
+            return chars, False
+        elif op == sre_parser.IN:
+            for item_op, item_av in av:
+                if item_op == sre_parser.LITERAL:
+                    chars.add(chr(item_av).lower())
+                elif item_op == sre_parser.RANGE:
+                    chars.update(chr(code).lower() for code in range(item_av[0], item_av[1] + 1))
+                else:
+                    raise ValueError(f"Не удалось определить первые символы паттерна: {item_op}")
+            return chars, False
+        elif op == sre_parser.BRANCH:
+            nullable = False
+            for branch in av[1]:
+                branch_chars, branch_nullable = _first_chars(branch)
+                chars |= branch_chars
+                nullable = nullable or branch_nullable
+            if not nullable:
+                return chars, False
+        elif op == sre_parser.SUBPATTERN:
+            sub_chars, sub_nullable = _first_chars(av[3])
+            chars |= sub_chars
+            if not sub_nullable:
+                return chars, False
+        elif op in (sre_parser.MAX_REPEAT, sre_parser.MIN_REPEAT):
+            sub_chars, sub_nullable = _first_chars(av[2])
+            chars |= sub_chars
+            if av[0] > 0 and not sub_nullable:
+                return chars, False
+        elif op != sre_parser.AT:
+            raise ValueError(f"Не удалось определить первые символы паттерна: {op}")
+    return chars, True
+
+
+def _start_guard(pattern: str) -> str:
+    """Lookahead на возможные первые буквы ссылки (вычисляется из самого паттерна).
+    Для re он сразу отсекает позиции, с которых ссылка начаться не может, без
+    перебора всех альтернатив; RE2 это не нужно"""
+    chars, nullable = _first_chars(sre_parser.parse(pattern))
+    if nullable:
+        raise ValueError("Паттерн ссылок может совпасть с пустой строкой")
+    return '(?=[' + ''.join(re.escape(c) for c in sorted(chars)) + '])'
+
+
+def _compile_legal_pattern(pattern: str):
+    """Компиляция паттерна ссылок: через RE2, если он выбран и установлен, иначе через re.
+    Возвращает скомпилированный паттерн и имя использованного движка"""
+    if LEGAL_REGEX_ENGINE == "re2":
+        if re2 is None:
+            logger.warning("LEGAL_REGEX_ENGINE=re2, но пакет google-re2 не установлен, используется re")
+        else:
+            try:
+                return re2.compile('(?i)' + pattern + _LEGAL_END_RE2), "re2"
+            except re2.error as e:
+                logger.warning("RE2 не смог скомпилировать паттерн ссылок (%s), используется re", e)
+    return re.compile(_start_guard(pattern) + pattern + _LEGAL_END, re.IGNORECASE), "re"
+
+
+_LEGAL_FAMILIES = (_PAT_KODEKS, _PAT_ABBR, _PAT_UKAZ, _PAT_FZ, _PAT_KONST, _PAT_FSBU_PBU)
+
+# Семейства собираются в одну альтернацию: общее начало ссылки разбирается
+# один раз на позицию, а не отдельно для каждого семейства
+_LEGAL_RE, _LEGAL_RE_ENGINE = _compile_legal_pattern(_LEGAL_PREFIX + r'(?P<остальное>(?:' + '|'.join(_LEGAL_FAMILIES) + r'))')
+
+
+# Токен: номер (12, 4.6, 43.2-6, 5а), слово (в т.ч. через дефис) или знак препинания
+_TOKEN_RE = re.compile(r'\d+(?:[.\-]\d+)*\w*|\w+(?:-\w+)*|[^\w\s]')
+
+# Сокращения, которые сохраняются без точки и без лемматизации
+_LEGAL_ABBREVS = frozenset({'ст', 'п', 'пп', 'ст.', 'п.', 'пп.', 'нк', 'гк', 'ук', 'тк', 'апк', 'бк', 'коап', 'рф', 'ч'})
+
+# Тексты длиннее этого порога не кэшируются, чтобы кэш не разрастался
+_NORMALIZE_CACHE_MAX_LEN = 20_000
+
+
+@functools.lru_cache(maxsize=200_000)
+def _lemma(token: str) -> str:
+    """Нормальная форма слова (кэшируется: в документах слова часто повторяются)"""
+    return morph_analyzer.parse(token)[0].normal_form
+
+
+def _scan_token(token: str):
+    """Один проход по токену: (есть ли в нем цифры, состоит ли он только из букв)"""
+    is_alpha = bool(token)
+    for c in token:
+        if c.isdigit():
+            return True, False
+        if not c.isalpha():
+            is_alpha = False
+    return False, is_alpha
+
+
+def _normalize_text(text: str) -> str:
     """Нормализация текста с помощью морфологического анализа"""
     global morph_analyzer, stopwords_ru
     
-    tokens = word_tokenize(text.lower(), language='russian')
+    tokens = _TOKEN_RE.findall(text.lower())
     normalized_tokens = []
     
     for token in tokens:
-        if re.match(r'^\d+\.\d+', token) or re.match(r'^\d+(?:\.\d+)+$', token):
+        has_digit, is_alpha = _scan_token(token)
+        if has_digit:
+            # Номера (12, 4.6, 43.2-6, 5а) сохраняются как есть
             normalized_tokens.append(token)
-        elif token.isdigit() or (any(c.isdigit() for c in token) and any(c.isalpha() for c in token)):
-            normalized_tokens.append(token)
-        elif token in ['ст', 'п', 'пп', 'ст.', 'п.', 'пп.', 'нк', 'гк', 'ук', 'тк', 'апк', 'бк', 'коап', 'рф', 'ч']:
+        elif token in _LEGAL_ABBREVS:
             normalized_tokens.append(token.split('.')[0])
-        elif token.isalpha() and token not in stopwords_ru:
-            parsed = morph_analyzer.parse(token)[0]
-            normalized_tokens.append(parsed.normal_form)
+        elif is_alpha and token not in stopwords_ru:
+            normalized_tokens.append(_lemma(token))
         elif token != '.':
             normalized_tokens.append(token)
 
     return ' '.join(normalized_tokens)
 
 
+_normalize_cached = functools.lru_cache(maxsize=4096)(_normalize_text)
+
+
+def normalize_text(text: str) -> str:
+    """Нормализация текста с кэшированием результата для повторяющихся запросов"""
+    if len(text) > _NORMALIZE_CACHE_MAX_LEN:
+        return _normalize_text(text)
+    return _normalize_cached(text)
+
+
+def _is_entity_char(c: str) -> bool:
+    """Символ, который может входить в номер: цифра, строчная буква, запятая, точка, дефис, пробел"""
+    return 'а' <= c <= 'я' or c.isdecimal() or c.isspace() or c in ',.-'
+
+
 def extract_multiple_entities(raw: str):
     """Извлечение множественных сущностей из строки"""
-    clean_subpoint = re.sub(r'[^\dа-я,\s\.\-]', '', raw.lower())
-    clean_subpoint = re.sub(r'(?<!\d)\.(?!\d)', '', clean_subpoint)
-    parts = re.split(r'[,и]', clean_subpoint)
-    
+    chars = [c for c in raw.lower() if _is_entity_char(c)]
+    last = len(chars) - 1
+
     entities = []
-    for part in parts:
-        part = part.strip()
-        if part:
-            entities.append(part)
-    
+    part = []
+    for i, c in enumerate(chars):
+        if c == '.' and not ((i > 0 and chars[i - 1].isdecimal()) or (i < last and chars[i + 1].isdecimal())):
+            # Точка вне числа (например, в "п.") отбрасывается
+            continue
+        if c == ',' or c == 'и':
+            entity = ''.join(part).strip()
+            if entity:
+                entities.append(entity)
+            part = []
+        else:
+            part.append(c)
+    entity = ''.join(part).strip()
+    if entity:
+        entities.append(entity)
+
     return entities if entities else [raw]
 
 
+@functools.lru_cache(maxsize=8192)
 def find_law_id_fuzzy(law_name):
-    """Поиск ID закона по названию с помощью нечеткого поиска"""
-    global law_aliases_invers
-    
-    max_score = 0
-    for law_key in law_aliases_invers.keys():
-        lev_score = fuzz.partial_ratio(law_name, law_key.lower())
-        if lev_score > max_score:
-            max_score = lev_score
-            res_key = law_key
-    if max_score < 90:
+    """Поиск ID закона по названию: точное вхождение алиаса, иначе нечеткий поиск"""
+    global law_keys_lower, law_key_ids, law_automaton
+
+    # Быстрый путь: самый длинный алиас, входящий в название целыми словами
+    name = law_name.lower()
+    best_key, best_id = None, None
+    for end, (key, law_id) in law_automaton.iter(name):
+        start = end - len(key) + 1
+        if (start > 0 and name[start - 1].isalnum()) or (end + 1 < len(name) and name[end + 1].isalnum()):
+            continue
+        if best_key is None or len(key) > len(best_key):
+            best_key, best_id = key, law_id
+    if best_key is not None:
+        return best_id
+
+    hit = process.extractOne(name, law_keys_lower, scorer=fuzz.partial_ratio, score_cutoff=90)
+    if hit is None:
         return None
-    else:
-        return law_aliases_invers[res_key]
+    return law_key_ids[hit[2]]
 
 
-def process_match(match, context):
-    """Обработка найденного совпадения и создание объектов LawLink"""
-    references = []
-    groups = match.groups()
-
-    articles = []
-    point_articles = []
-    subpoint_articles = []
-
-    if match.group('пункт_номера') is None:
-        point_articles = [None]
-        if match.group('часть_номера') is not None:
-            if ',' in match.group('часть_номера') or 'и' in match.group('часть_номера'):
-                point_articles = extract_multiple_entities(match.group('часть_номера'))
-            else:
-                point_articles = [match.group('часть_номера')]
-        else:
-            point_articles = [None]
-    else:
-        if ',' in match.group('пункт_номера') or 'и' in match.group('пункт_номера'):
-            point_articles = extract_multiple_entities(match.group('пункт_номера'))
-        else:
-            point_articles = [match.group('пункт_номера')]
+def _split_entities(value: Optional[str]) -> List[Optional[str]]:
+    """Список номеров из группы совпадения (с разбором перечислений через запятую и «и»)"""
+    if value is None:
+        return [None]
+    if ',' in value or 'и' in value:
+        return extract_multiple_entities(value)
+    return [value]
 
-    if match.group('подпункт_номера') is None:
-        subpoint_articles = [None]
-    else:
-        if ',' in match.group('подпункт_номера') or 'и' in match.group('подпункт_номера'):
-            subpoint_articles = extract_multiple_entities(match.group('подпункт_номера'))
-        else:
-            subpoint_articles = [match.group('подпункт_номера')]
 
-    if match.group('статья_номера') is None:
-        articles = [None]
-    else:
-        if ',' in match.group('статья_номера') or 'и' in match.group('статья_номера'):
-            articles = extract_multiple_entities(match.group('статья_номера'))
-        else:
-            articles = [match.group('статья_номера')]
-
-    law_id = find_law_id_fuzzy(match.group('остальное'))
+# Ссылка в виде кортежа (law_id, article, point_article, subpoint_article)
+LawRef = Tuple[Optional[int], Optional[str], Optional[str], Optional[str]]
 
-    for article in articles:
-        for point_article in point_articles:
-            for subpoint_article in subpoint_articles:
-                reference = LawLink(
-                    law_id=law_id,
-                    article=article,
-                    point_article=point_article,
-                    subpoint_article=subpoint_article
-                )
-                references.append(reference)
 
-    return references
+def process_match(match, context) -> List[LawRef]:
+    """Обработка найденного совпадения: все комбинации статья x пункт x подпункт"""
+    groups = match.groupdict()
 
+    articles = _split_entities(groups['статья_номера'])
+    point_articles = _split_entities(groups['пункт_номера'] or groups['часть_номера'])
+    subpoint_articles = _split_entities(groups['подпункт_номера'])
 
-def find_references_in_text(original_text: str) -> List[LawLink]:
-    """Поиск правовых ссылок в тексте с помощью регулярных выражений"""
-    references = []
+    law_id = find_law_id_fuzzy(groups['остальное'])
 
-    patterns = [
-        # Паттерн для парсинга структуры ссылки
-        r'(?:в\s+)?(?:(?P<подпункт_ключ>пп\.|подпункт[а-я]{0,7}|подп\.)\s*(?P<подпункт_номера>(?:\d{1,4}[а-я]?|[а-я])(?:\s*,\s*(?:\d{1,4}[а-я]?|[а-я]))*(?:\s*и\s*(?:\d{1,4}[а-я]?|[а-я]))?)\s+)?'
-        r'(?:в\s+)?(?:(?P<пункт_ключ>п\.|пункт[а-я]{0,5}|пунт[а-я]{0,5})\s*(?P<пункт_номера>(?:\d{1,4}(?:[\.\-]\d{1,3})*[а-я]?|[а-я])(?:\s*,\s*(?:\d{1,4}(?:[\.\-]\d{1,3})*[а-я]?|[а-я]))*(?:\s*и\s*(?:\d{1,4}(?:[\.\-]\d{1,3})*[а-я]?|[а-я]))?)\s+)?'
-        r'(?:в\s+)?(?:(?P<часть_ключ>ч\.|част[ьи])\s*(?P<часть_номера>(?:\d{1,3}(?:\.\d{1,3})?|[а-я])(?:\s*,\s*(?:\d{1,3}(?:\.\d{1,3})?|[а-я]))*(?:\s*и\s*(?:\d{1,3}(?:\.\d{1,3})?|[а-я]))?)(?:\s*,\s*)?\s+)?'
-        r'(?:в\s+)?(?:(?P<статья_ключ>ст\.|стать[ейиюя]|статей?|статья)\s*(?:(?:в|на|по)\s+)?(?P<статья_номера>(?:\d{1,4}(?:[\.\-]\d{1,3})*[а-я]?)(?:\s*,\s*(?:\d{1,4}(?:[\.\-]\d{1,3})*[а-я]?))*(?:\s*и\s*(?:\d{1,4}(?:[\.\-]\d{1,3})*[а-я]?))?)\s+)?'
-        r'(?P<остальное>(?:'
-        # Кодексы
-        r'(?:Арбитражн(?:ого|ый)\s+процессуальн(?:ого|ый)|Бюджетн(?:ого|ый)|Водн(?:ого|ый)|Воздушн(?:ого|ый)|Градостроительн(?:ого|ый)|Гражданск(?:ого|ий)|Гражданск(?:ого|ий)\s+процессуальн(?:ого|ый)|Жилищн(?:ого|ый)|Семейн(?:ого|ый)|Таможенн(?:ого|ый)|Трудов(?:ого|ой)|Уголовно-исполнительн(?:ого|ый)|Уголовно-процессуальн(?:ого|ый)|Уголовн(?:ого|ый)|Лесн(?:ого|ой)|Налогов(?:ого|ый)|Земельн(?:ого|ый))\s+кодекс(?:а|)(?:\s+Российской Федерации|\s+России|\s+РФ|)'
-        # Аббревиатуры
-        r'|АПК(?:\s+(?:России|РФ))?|БК(?:\s+(?:России|РФ))?|ГК(?:\s+РФ)?|ГПК(?:\s+(?:России|РФ))?|ЖК(?:\s+(?:России|РФ))?|СК(?:\s+(?:России|РФ))?|ТК(?:\s+РФ)?'
-        r'|УИК(?:\s+(?:России|РФ))?|УПК(?:\s+(?:России|РФ))?|УК(?:\s+(?:России|РФ))?|ЛК(?:\s+(?:России|РФ))?|НК(?:\s+(?:России|РФ))?|ЗК(?:\s+(?:России|РФ))?'
-        # Кодексы об административных правонарушениях
-        r'|Кодекс(?:а|)(?:\s+Российской Федерации|\s+России|\s+РФ|)?\s+об\s+административных\s+правонарушениях|КоАП(?:\s+Российской Федерации|\s+России|\s+РФ|)?'
-        # Другие кодексы
-        r'|Кодекс(?:а|)\s+административного\s+судопроизводства(?:\s+Российской Федерации|\s+России|\s+РФ|)?'
-        r'|Кодекс(?:а|)\s+внутреннего\s+водного\s+транспорта(?:\s+Российской Федерации|\s+России|\s+РФ|)?'
-        r'|Кодекс(?:а|)\s+торгового\s+мореплавания(?:\s+Российской Федерации|\s+России|\s+РФ|)?'
-        # Указы Президента
-        r'|Указ(?:а|)(?:\s+Президента(?:\s+Российской Федерации|\s+России|\s+РФ|)?)?(?:\s+(?:№?\s*\d+|\s*от\s*\d{2}\.\d{2}\.\d{4}))?(?:\s*«[^»]*»)?'
-        # Распоряжения Президента
-        r'|Распоряжени(?:я|е)(?:\s+Президента(?:\s+Российской Федерации|\s+России|\s+РФ|)?)?(?:\s+(?:№?\s*\d+-\s*рп|от\s*\d{2}\.\d{2}\.\d{4}))?(?:\s*«[^»]*»)?'
-        r'|РП(?:\s+(?:№?\s*\d+-\s*рп|от\s*\d{2}\.\d{2}\.\d{4}))?(?:\s*«[^»]*»)?'
-        # Федеральные законы
-        r'|Федеральн(?:ого|ый)\s+закон(?:а|)(?:\s+[^,\.;]*)?'
-        r'|ФЗ(?:\s+[^,\.;]*)?'
-        r'|Закона\s+«[^»]*»'
-        r'|Закона\s+"[^"]*"'
-        # Конституция
-        r'|Конституци(?:и|я)(?:\s+РФ|\s+России|\s+Российской Федерации)?'
-        # Основы законодательства
-        r'|Основы\s+законодательства(?:\s+(?:Российской\s+Федерации|России|РФ))?(?:\s+№?\s*\d+(?:-I)?)?(?:\s+от\s+\d{2}\.\d{2}\.\d{4})?(?:\s*«[^»]*»)?'
-        # Законы Российской Федерации
-        r'|Закон(?:\s+(?:Российской\s+Федерации|России|РФ))?(?:\s+№?\s*\d+(?:-I)?)?(?:\s+от\s+\d{2}\.\d{2}\.\d{4})?(?:\s*«[^»]*»)?'
-        # Федеральные стандарты бухгалтерского учета
-        r'|Федеральный\s+стандарт\s+бухгалтерского\s+учета(?:\s+(?:государственных\s+финансов|для\s+организаций\s+государственного\s+сектора))?(?:\s+ФСБУ\s*\d+(?:\/\d{4})?)?(?:\s*«[^»]*»)?'
-        r'|ФСБУ(?:\s+(?:государственных\s+финансов|для\s+организаций\s+государственного\s+сектора))?(?:\s*\d+(?:\/\d{4})?)?(?:\s*«[^»]*»)?'
-        # Положения по бухгалтерскому учету
-        r'|Положение\s+по\s+бухгалтерскому\s+учету(?:\s+ПБУ\s*\d+(?:\/\d{4})?)?(?:\s*«[^»]*»)?'
-        r'|ПБУ(?:\s*\d+(?:\/\d{4})?)?(?:\s*«[^»]*»)?'
-        # Положение по ведению бухгалтерского учета
-        r'|Положени(?:я|е)\s+по\s+ведению\s+бухгалтерского\s+учета\s+и\s+бухгалтерской\s+отчетности\s+в\s+Российской\s+Федерации'
-        r')'
-        r'(?=\s|,|\.|;|$))'
+    return [
+        (law_id, article, point_article, subpoint_article)
+        for article, point_article, subpoint_article in itertools.product(articles, point_articles, subpoint_articles)
     ]
 
-    all_matches = []
-    for pattern in patterns:
-        matches = re.finditer(pattern, original_text, re.IGNORECASE)
-        all_matches.append(matches)
 
-    # Удаляем дубликаты и выводим
-    unique_matches = list(dict.fromkeys(all_matches))
+def find_references_in_text(original_text: str) -> List[LawRef]:
+    """Поиск правовых ссылок в тексте с помощью регулярных выражений"""
+    references = []
 
-    iter_count = 0
-    for matches in unique_matches:
-        for match in matches:
-            iter_count += 1
-            print(f"Match {iter_count}: {match.groups()}")
-            references.extend(process_match(match, original_text))
+    for match in _LEGAL_RE.finditer(original_text):
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Совпадение: %s", match.groups())
+        references.extend(process_match(match, original_text))
 
     return references
 
 
-def extract_legal_references_advanced(text: str):
+def extract_legal_references_advanced(text: str) -> List[LawLink]:
     """Основная функция для извлечения правовых ссылок из текста"""
+    # Повторные ссылки отбрасываются до создания моделей, порядок первого вхождения сохраняется
+    seen = set()
     references = []
-    sentence_references = find_references_in_text(text)
-    references.extend(sentence_references)
+    for ref in find_references_in_text(text):
+        if ref in seen:
+            continue
+        seen.add(ref)
+        law_id, article, point_article, subpoint_article = ref
+        references.append(LawLink.model_construct(
+            law_id=law_id,
+            article=article,
+            point_article=point_article,
+            subpoint_article=subpoint_article
+        ))
     return references
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup
-    global morph_analyzer, stopwords_ru, law_aliases_invers
+    global morph_analyzer, stopwords_ru, law_aliases_invers, law_keys_lower, law_key_ids, law_automaton
     
-    print("🚀 Сервис запускается...")
-    
-    # Загружаем данные NLTK
-    print("📥 Загружаем данные NLTK...")
-    try:
-        nltk.download('punkt')
-        nltk.download('punkt_tab')
-        nltk.download('stopwords')
-    except ssl.SSLError as e:
-        print(f"Ошибка SSL: {e}")
-    except Exception as e:
-        print(f"Произошла ошибка: {e}")
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    logger.info("🚀 Сервис запускается...")
+    logger.info("🔎 Движок регулярных выражений для ссылок: %s", _LEGAL_RE_ENGINE)
     
-    # Инициализируем компоненты
-    print("🔧 Инициализируем компоненты...")
+    # Инициализируем компоненты (stopwords NLTK скачиваются заранее, при сборке образа)
+    logger.info("🔧 Инициализируем компоненты...")
     morph_analyzer = pym.MorphAnalyzer()
-    stopwords_ru = stopwords.words("russian")
+    _lemma.cache_clear()
+    stopwords_ru = frozenset(stopwords.words("russian"))
+    _normalize_cached.cache_clear()
     
     # Загружаем алиасы законов
-    print("📚 Загружаем базу законов...")
+    logger.info("📚 Загружаем базу законов...")
     with open("law_aliases.json", "r", encoding='utf-8') as file:
         codex_aliases = json.load(file)
     
-    # Создаем обратный словарь
-    law_aliases_invers = {i: k for k, v in codex_aliases.items() for i in v}
+    # Создаем обратный словарь (ID сразу приводим к int: LawLink создается без валидации)
+    law_aliases_invers = {i: int(k) for k, v in codex_aliases.items() for i in v}
+
+    # Индекс для нечеткого поиска: ключи в нижнем регистре и ID законов по тем же позициям
+    law_keys_lower = [k.lower() for k in law_aliases_invers]
+    law_key_ids = list(law_aliases_invers.values())
+
+    # Автомат Ахо-Корасик для точного поиска алиасов
+    law_automaton = ahocorasick.Automaton()
+    for key, law_id in zip(law_keys_lower, law_key_ids):
+        law_automaton.add_word(key, (key, law_id))
+    law_automaton.make_automaton()
+    find_law_id_fuzzy.cache_clear()
     
     app.state.codex_aliases = codex_aliases
     app.state.law_aliases_invers = law_aliases_invers
+    app.state.law_keys_lower = law_keys_lower
+    app.state.law_key_ids = law_key_ids
+    app.state.law_automaton = law_automaton
     app.state.morph_analyzer = morph_analyzer
     app.state.stopwords_ru = stopwords_ru
     
-    print("✅ Сервис готов к работе!")
+    logger.info("✅ Сервис готов к работе!")
     yield
     
     # Shutdown
-    print("🛑 Сервис завершается...")
+    logger.info("🛑 Сервис завершается...")
     del codex_aliases
     del law_aliases_invers
     del morph_analyzer
@@ -297,18 +435,19 @@ async def get_law_links(
     """
     Принимает текст и возвращает список юридических ссылок
     """
-    print(f"🔍 Обрабатываем текст длиной {len(data.text)} символов")
+    logger.info("🔍 Обрабатываем текст длиной %d символов", len(data.text))
     
     try:
-        # Извлекаем правовые ссылки из текста
-        references = extract_legal_references_advanced(data.text)
+        # Извлекаем правовые ссылки из текста в отдельном потоке,
+        # чтобы CPU-нагрузка не блокировала event loop
+        references = await asyncio.to_thread(extract_legal_references_advanced, data.text)
         
-        print(f"✅ Найдено {len(references)} правовых ссылок")
+        logger.info("✅ Найдено %d правовых ссылок", len(references))
         
         return LinksResponse(links=references)
         
     except Exception as e:
-        print(f"❌ Ошибка при обработке текста: {e}")
+        logger.exception("❌ Ошибка при обработке текста: %s", e)
         return LinksResponse(links=[])
 
 
@@ -322,4 +461,4 @@ async def health_check():
 
 
 if __name__ == "__main__":
-    uvicorn.run(app, host="0.0.0.0", port=8978)
\ No newline at end of file
+    uvicorn.run("main:app", host="0.0.0.0", port=8978, loop="uvloop", http="httptools", workers=os.cpu_count())
\ No newline at end of file
@@ -0,0 +1,28 @@
+import pytest
+
+main = pytest.importorskip("main")
+
+
+def _legal_matches(text):
+    return [match.groupdict() for match in main._LEGAL_RE.finditer(text)]
+
+
+def test_default_engine_is_re():
+    assert main._LEGAL_RE_ENGINE == "re"
+
+
+@pytest.mark.parametrize("text, article, point, law", [
+    ("Согласно ст. 5 НК\xa0РФ", "5", None, "НК\xa0РФ"),
+    ("В соответствии с п. 1 ст. 374 НК\xa0РФ объектами", "374", "1", "НК\xa0РФ"),
+    ("Согласно ст.\xa05 НК РФ", "5", None, "НК РФ"),
+])
+def test_reference_with_non_breaking_space(text, article, point, law):
+    matches = _legal_matches(text)
+    assert len(matches) == 1
+    assert matches[0]["статья_номера"] == article
+    assert matches[0]["пункт_номера"] == point
+    assert matches[0]["остальное"] == law
+
+
+def test_start_guard_covers_every_family():
+    assert main._start_guard(r'(?:в\s+)?(?:Инструкци[яи]|ПБУ)') == '(?=[вип])'